@@ -41,6 +41,9 @@ CELERY_ACCEPT_CONTENT = ['pickle', 'json', 'msgpack', 'yaml']
 
 PLAYER_CHANNEL = os.environ.get('PLAYER_CHANNEL', 'fm:events')
 PLAYLIST_REDIS_KEY = os.environ.get('PLAYLIST_KEY', 'fm:player:queue')
+PLAYLIST_ITEMS_REDIS_KEY = os.environ.get('PLAYLIST_ITEMS_KEY', 'fm:player:queue:items')
+PLAYLIST_ORDER_REDIS_KEY = os.environ.get('PLAYLIST_ORDER_KEY', 'fm:player:queue:order')
+PLAYLIST_META_REDIS_KEY = os.environ.get('PLAYLIST_META_KEY', 'fm:player:queue:meta')
 
 # Via
 
@@ -8,23 +8,67 @@ generating random content.
 # Standard Libs
 import json
 import uuid
+from collections import Counter
 
 # Third Party Libs
+from flask import url_for
+from kim.roles import blacklist
+from sqlalchemy.orm import subqueryload
 from sqlalchemy.sql import func
 
 # First Party Libs
 from fm.ext import config, redis
+from fm.logic import scripts
 from fm.models.spotify import Track
+from fm.models.user import User
+from fm.serializers.spotify import TrackSerializer
+from fm.serializers.user import UserSerializer
+
+
+#: Version of the track and user snapshot embedded in queue entries. Bump
+#: this when the snapshot format changes, entries holding an older version
+#: are then hydrated from the database instead.
+SNAPSHOT_VERSION = 1
 
 
 class Queue(object):
     """
     A class wraps a player queue logic. Class provides simple and atomic
     operations to a redis instance.
+
+    The queue is stored in two redis keys, a hash of queue entries keyed by
+    their uuid (``PLAYLIST_ITEMS_REDIS_KEY``) and a list of uuids holding the
+    queue order (``PLAYLIST_ORDER_REDIS_KEY``). This allows an entry to be
+    looked up, checked or removed by uuid in a constant number of round trips
+    regardless of the queue length.
+
+    Queue meta data (track, genre and user counts and total play time) is kept
+    up to date in a third hash (``PLAYLIST_META_REDIS_KEY``) as entries are
+    added and removed. Each entry stores what it contributed to the meta data
+    so it can be taken off again exactly when the entry is removed.
+
+    Changes to the queue are made by the Lua scripts in ``fm.logic.scripts``
+    so each change and its player event happen atomically.
     """
 
     @staticmethod
-    def add(uri, user, notification=True):
+    def keys():
+        """ Returns the redis keys passed to the queue scripts.
+
+        Returns
+        -------
+        list
+            The items hash, order list and meta data hash keys
+        """
+
+        return [
+            config.PLAYLIST_ITEMS_REDIS_KEY,
+            config.PLAYLIST_ORDER_REDIS_KEY,
+            config.PLAYLIST_META_REDIS_KEY,
+        ]
+
+    @staticmethod
+    def add(uri, user, notification=True, snapshot=None):
         """ Add a track into a redis queue
 
         Parameters
@@ -33,44 +77,272 @@ class Queue(object):
             The spotify URI of the Track to add to the Queue
         user: str
             The user id of the user whome added the track to the Queue
+        snapshot: dict, optional
+            Pre-serialized track and user data from ``Queue.snapshot``
+
+        Returns
+        -------
+        str
+            Unique identifator of the track in the queue
+        """
+
+        entry = {'uri': uri, 'user': user}
+        if snapshot is not None:
+            entry['snapshot'] = snapshot
+
+        return Queue.add_many([entry], notification)[0]
+
+    @staticmethod
+    def add_many(entries, notification=True):
+        """ Add tracks to the end of the redis queue in order with a single
+        write. One add event is published for the whole batch, with the
+        queued tracks listed under ``tracks`` when there is more than one.
+
+        Parameters
+        ----------
+        entries: list
+            Dicts of ``uri``, ``user`` and optionally ``snapshot`` to add
+        notification: bool, optional
+            Publish an add event, defaults to ``True``
+
+        Returns
+        -------
+        list
+            Unique identifators of the tracks in the queue
         """
 
-        # Push the Track into the Queue
-        redis.rpush(
-            config.PLAYLIST_REDIS_KEY,
-            json.dumps({
-                'uri': uri,
-                'user': user,
+        items = []
+        for entry in entries:
+            item = {
+                'uri': entry['uri'],
+                'user': entry['user'],
                 'uuid': str(uuid.uuid4()),
-            })
-        )
+            }
+            if entry.get('snapshot') is not None:
+                item['snapshot'] = entry['snapshot']
+            items.append(item)
+
+        if not items:
+            return []
+
+        args = [config.PLAYER_CHANNEL, '']
+        for item, meta in zip(items, Queue.get_meta_fields(items)):
+            item['meta'] = meta
+            args.extend([item['uuid'], json.dumps(item)])
 
         # Publish Add Event
         if notification:
-            redis.publish(config.PLAYER_CHANNEL, json.dumps({
+            event = {
                 'event': 'add',
-                'uri': uri,
-                'user': user
-            }))
+                'uri': items[0]['uri'],
+                'user': items[0]['user']
+            }
+            if len(items) > 1:
+                event['tracks'] = [
+                    {'uri': item['uri'], 'user': item['user'], 'uuid': item['uuid']}
+                    for item in items]
+            args[1] = json.dumps(event)
+
+        # Push the Tracks into the Queue
+        scripts.queue_add(redis, keys=Queue.keys(), args=args)
+
+        return [item['uuid'] for item in items]
 
     @staticmethod
-    def iterate():
-        for index in range(Queue.length()):
-            yield Queue.get_item(index)
+    def snapshot(track, user):
+        """ Builds the snapshot of a track and the user who queued it which
+        is embedded in the queue entry, allowing the queue to be rendered
+        without touching the database.
+
+        Parameters
+        ----------
+        track: fm.models.spotify.Track
+            The queued track
+        user: fm.models.user.User
+            The user who queued the track
+
+        Returns
+        -------
+        dict
+            The snapshot
+        """
+
+        return {
+            'version': SNAPSHOT_VERSION,
+            'track': TrackSerializer().serialize(track),
+            'user': UserSerializer().serialize(
+                user,
+                role=blacklist('spotify_playlists')),
+            'spotify': user.spotify_id is not None,
+            'genres': Queue.get_genres(track),
+        }
+
+    @staticmethod
+    def get_genres(track):
+        """ Returns the names of the genres of a tracks album artists.
+
+        Parameters
+        ----------
+        track: fm.models.spotify.Track
+            The track
+
+        Returns
+        -------
+        list
+            Sorted list of unique genre names
+        """
+
+        genres = set(
+            genre.name
+            for artist in track.album.artists
+            for genre in artist.genres)
+
+        return sorted(genres)
+
+    @staticmethod
+    def get_snapshot(item):
+        """ Returns the snapshot of a queue entry if it has one in the current
+        snapshot format.
+
+        Parameters
+        ----------
+        item: dict
+            Decoded queue entry
+
+        Returns
+        -------
+        dict or None
+            The snapshot or None if the entry must be hydrated from the
+            database
+        """
+
+        snapshot = item.get('snapshot')
+        if snapshot is None or snapshot.get('version') != SNAPSHOT_VERSION:
+            return None
+
+        return snapshot
+
+    @staticmethod
+    def render(items):
+        """ Serializes queue entries for the API, entries with a snapshot are
+        served as is and the rest are hydrated from the database. Entries
+        whose track or user no longer exist are skipped.
+
+        Parameters
+        ----------
+        items: iterable
+            Decoded queue entries
+
+        Returns
+        -------
+        list
+            Serialized entries in queue order
+        """
+
+        items = list(items)
+        stale = [item for item in items if Queue.get_snapshot(item) is None]
+        hydrated = dict(
+            (item['uuid'], (track, user))
+            for item, track, user in Queue.hydrate(stale))
+
+        response = []
+        for item in items:
+            snapshot = Queue.get_snapshot(item)
+            if snapshot is not None:
+                user = dict(snapshot['user'], spotify_playlists=None)
+                if snapshot['spotify']:
+                    user['spotify_playlists'] = url_for(
+                        'users.user_spotify_playlists',
+                        user_pk=user['id'],
+                        _external=True)
+                response.append({
+                    'track': snapshot['track'],
+                    'user': user,
+                    'uuid': item['uuid'],
+                })
+                continue
+
+            track, user = hydrated[item['uuid']]
+            if track is not None and user is not None:
+                response.append({
+                    'track': TrackSerializer().serialize(track),
+                    'user': UserSerializer().serialize(user),
+                    'uuid': item['uuid'],
+                })
+
+        return response
+
+    @staticmethod
+    def get(uuid):
+        """ Returns a single queue entry by its uuid.
+
+        Parameters
+        ----------
+        uuid: str
+            Unique identifator of track in the queue
+
+        Returns
+        -------
+        dict or None
+            The decoded queue entry or None if it is not in the queue
+        """
+
+        item = redis.hget(config.PLAYLIST_ITEMS_REDIS_KEY, uuid)
+        if item is None:
+            return None
+
+        return json.loads(item)
+
+    @staticmethod
+    def exists(uuid):
+        """ Checks if an entry is in the queue.
+
+        Parameters
+        ----------
+        uuid: str
+            Unique identifator of track in the queue
+
+        Returns
+        -------
+        bool
+        """
+
+        return bool(redis.hexists(config.PLAYLIST_ITEMS_REDIS_KEY, uuid))
 
     @staticmethod
     def get_item(index):
-        return redis.lindex(config.PLAYLIST_REDIS_KEY, index)
+        """ Returns the queue entry at the given position.
+
+        Parameters
+        ----------
+        index: int
+            Position in the queue
+
+        Returns
+        -------
+        dict or None
+            The decoded queue entry or None if there is no entry at the index
+        """
+
+        item_uuid = redis.lindex(config.PLAYLIST_ORDER_REDIS_KEY, index)
+        if item_uuid is None:
+            return None
+
+        return Queue.get(item_uuid)
 
     @staticmethod
     def get_queue(offset=0, limit=None):
         if limit is None:
             limit = Queue.length()
 
-        tracks = redis.lrange(
-            config.PLAYLIST_REDIS_KEY, offset, (offset + limit - 1)
+        uuids = redis.lrange(
+            config.PLAYLIST_ORDER_REDIS_KEY, offset, (offset + limit - 1)
         )
-        return (json.loads(track) for track in tracks)
+        if not uuids:
+            return iter([])
+
+        tracks = redis.hmget(config.PLAYLIST_ITEMS_REDIS_KEY, uuids)
+        return (json.loads(track) for track in tracks if track is not None)
 
     @staticmethod
     def get_tracks(offset=0, limit=None):
@@ -85,10 +357,85 @@ class Queue(object):
             Limit
 
         """
-        return (
-            Track.query.filter(Track.spotify_uri == track['uri']).first()
-            for track in Queue.get_queue(offset, limit)
-        )
+        items = list(Queue.get_queue(offset, limit))
+        tracks = Queue.load_tracks(item['uri'] for item in items)
+
+        return (tracks.get(item['uri']) for item in items)
+
+    @staticmethod
+    def load_tracks(uris):
+        """ Loads the Tracks for a set of spotify URIs in a single query.
+
+        Parameters
+        ----------
+        uris: iterable
+            Spotify URIs of the Tracks to load
+
+        Returns
+        -------
+        dict
+            Tracks keyed by their spotify URI
+        """
+
+        uris = set(uris)
+        if not uris:
+            return {}
+
+        tracks = Track.query \
+            .options(subqueryload(Track.artist_associations)) \
+            .filter(Track.spotify_uri.in_(uris)) \
+            .all()
+
+        return dict((track.spotify_uri, track) for track in tracks)
+
+    @staticmethod
+    def load_users(ids):
+        """ Loads the Users for a set of primary keys in a single query.
+
+        Parameters
+        ----------
+        ids: iterable
+            Primary keys of the Users to load
+
+        Returns
+        -------
+        dict
+            Users keyed by their primary key
+        """
+
+        ids = set(ids)
+        if not ids:
+            return {}
+
+        users = User.query.filter(User.id.in_(ids)).all()
+
+        return dict((user.id, user) for user in users)
+
+    @staticmethod
+    def hydrate(items):
+        """ Loads the Track and User of each queue entry, using one query per
+        model regardless of the number of entries.
+
+        Parameters
+        ----------
+        items: iterable
+            Decoded queue entries
+
+        Returns
+        -------
+        list
+            List of ``(item, track, user)`` tuples in queue order, the track
+            or user will be None if it no longer exists
+        """
+
+        items = list(items)
+        tracks = Queue.load_tracks(item['uri'] for item in items)
+        users = Queue.load_users(item['user'] for item in items)
+
+        return [
+            (item, tracks.get(item['uri']), users.get(item['user']))
+            for item in items
+        ]
 
     @staticmethod
     def length():
@@ -100,7 +447,7 @@ class Queue(object):
             number of items in a playlist queue
         """
 
-        return redis.llen(config.PLAYLIST_REDIS_KEY)
+        return redis.llen(config.PLAYLIST_ORDER_REDIS_KEY)
 
     @staticmethod
     def delete(uuid):
@@ -112,20 +459,182 @@ class Queue(object):
             Unique identifator of track in the queue
         """
 
-        for item in Queue.iterate():
-            json_item = json.loads(item)
-            if json_item.get('uuid') == uuid:
-                redis.lrem(config.PLAYLIST_REDIS_KEY, item, 1)
-                redis.publish(config.PLAYER_CHANNEL, json.dumps({
-                    'event': 'deleted',
-                    'uri': json_item['uri'],
-                    'user': json_item['user'],
-                    'uuid': json_item['uuid'],
-                }))
-                break
-        else:
+        item = scripts.queue_delete(
+            redis,
+            keys=Queue.keys(),
+            args=[config.PLAYER_CHANNEL, uuid])
+        if item is None:
             raise ValueError('Cannot find value')
 
+    @staticmethod
+    def move(uuid, position):
+        """ Move a track to a new position in the redis queue
+
+        Parameters
+        ----------
+        uuid: Uuid
+            Unique identifator of track in the queue
+        position: int
+            Zero based position to move the track to, positions past the end
+            of the queue move the track to the end
+        """
+
+        moved = scripts.queue_move(
+            redis,
+            keys=Queue.keys()[:2],
+            args=[config.PLAYER_CHANNEL, uuid, max(position, 0)])
+        if not moved:
+            raise ValueError('Cannot find value')
+
+    @staticmethod
+    def pop():
+        """ Removes and returns the entry at the head of the queue, this is
+        the next track the player should play.
+
+        Returns
+        -------
+        dict or None
+            The decoded queue entry or None if the queue is empty
+        """
+
+        item = scripts.queue_pop(redis, keys=Queue.keys())
+        if item is None:
+            return None
+
+        return json.loads(item)
+
+    @staticmethod
+    def get_meta_fields(items):
+        """ Calculates what queue entries contribute to the queue meta data
+        hash. Entries which already store their contribution use it, then
+        entries with a snapshot use that, the tracks of the remaining entries
+        are loaded from the database.
+
+        Parameters
+        ----------
+        items: iterable
+            Decoded queue entries
+
+        Returns
+        -------
+        list
+            Amount each meta data hash field changes by for each entry
+        """
+
+        items = list(items)
+        stale = [
+            item for item in items
+            if 'meta' not in item and Queue.get_snapshot(item) is None]
+        tracks = Queue.load_tracks(item['uri'] for item in stale)
+
+        meta = []
+        for item in items:
+            if 'meta' in item:
+                meta.append(item['meta'])
+                continue
+
+            snapshot = Queue.get_snapshot(item)
+            if snapshot is not None:
+                duration = snapshot['track']['duration']
+                genres = snapshot['genres']
+            else:
+                track = tracks.get(item['uri'])
+                duration = getattr(track, 'duration', 0)
+                genres = Queue.get_genres(track) if track is not None else []
+
+            fields = {
+                'total': 1,
+                'play_time': duration or 0,
+                u'user:{0}'.format(item['user']): 1,
+            }
+            for genre in genres:
+                fields[u'genre:{0}'.format(genre)] = 1
+
+            meta.append(fields)
+
+        return meta
+
+    @staticmethod
+    def get_meta():
+        """ Returns the queue meta data from the meta data hash.
+
+        Returns
+        -------
+        dict
+            Total number of tracks, genre and user counts and total play time
+        """
+
+        meta = {
+            'total': 0,
+            'genres': {},
+            'users': {},
+            'play_time': 0,
+        }
+
+        for field, value in redis.hgetall(config.PLAYLIST_META_REDIS_KEY).items():
+            field, value = field.decode('utf-8'), int(value)
+            if field in ('total', 'play_time'):
+                meta[field] = value
+            elif value > 0:
+                kind, _, name = field.partition(':')
+                meta['{0}s'.format(kind)][name] = value
+
+        return meta
+
+    @staticmethod
+    def rebuild_meta():
+        """ Rebuilds the queue meta data hash from scratch from the entries
+        currently in the queue, for use if it has drifted.
+
+        Returns
+        -------
+        dict
+            The rebuilt queue meta data
+        """
+
+        fields = Counter()
+        for meta in Queue.get_meta_fields(Queue.get_queue()):
+            fields.update(meta)
+
+        pipe = redis.pipeline()
+        pipe.delete(config.PLAYLIST_META_REDIS_KEY)
+        if fields:
+            pipe.hmset(config.PLAYLIST_META_REDIS_KEY, dict(fields))
+        pipe.execute()
+
+        return Queue.get_meta()
+
+    @staticmethod
+    def migrate():
+        """ One off migration of the legacy queue, a redis list of JSON
+        encoded entries stored at ``PLAYLIST_REDIS_KEY``, into the uuid
+        indexed queue. Migrated entries are appended to the end of the queue
+        in their original order, entries without a uuid are given one.
+
+        Returns
+        -------
+        int
+            Number of migrated entries
+        """
+
+        items = redis.lrange(config.PLAYLIST_REDIS_KEY, 0, -1)
+        if not items:
+            return 0
+
+        items = [json.loads(item) for item in items]
+        for item, meta in zip(items, Queue.get_meta_fields(items)):
+            item['uuid'] = item.get('uuid') or str(uuid.uuid4())
+            item['meta'] = meta
+
+        args = [config.PLAYER_CHANNEL, '']
+        for item in items:
+            args.extend([item['uuid'], json.dumps(item)])
+
+        scripts.queue_add(redis, keys=Queue.keys(), args=args)
+        redis.delete(config.PLAYLIST_REDIS_KEY)
+
+        return len(items)
+
 
 class Random(object):
     """
@@ -0,0 +1,163 @@
+"""
+fm.logic.scripts
+================
+Server side Lua scripts for atomic player queue operations. Each script
+applies its change to the queue keys and publishes the matching player
+event in a single round trip.
+
+Scripts are registered with redis lazily, once per process, and are then
+executed with ``EVALSHA``.
+"""
+
+#: Shared Lua helpers prepended to each queue script
+PRELUDE = """
+local function update_meta(key, item, sign)
+    for field, amount in pairs(item['meta'] or {}) do
+        if amount ~= 0 then
+            redis.call('HINCRBY', key, field, sign * amount)
+        end
+    end
+end
+"""
+
+#: Appends entries to the queue and optionally publishes an event.
+#:
+#: KEYS: items hash, order list, meta hash
+#: ARGV: channel, event (empty for none), then uuid and payload pairs
+#: Returns the new queue length
+ADD = PRELUDE + """
+for index = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[index], ARGV[index + 1])
+    redis.call('RPUSH', KEYS[2], ARGV[index])
+    update_meta(KEYS[3], cjson.decode(ARGV[index + 1]), 1)
+end
+
+if ARGV[2] ~= '' then
+    redis.call('PUBLISH', ARGV[1], ARGV[2])
+end
+
+return redis.call('LLEN', KEYS[2])
+"""
+
+#: Removes an entry from the queue by uuid and publishes a deleted event.
+#:
+#: KEYS: items hash, order list, meta hash
+#: ARGV: channel, uuid
+#: Returns the removed payload or nil if it is not in the queue
+DELETE = PRELUDE + """
+local payload = redis.call('HGET', KEYS[1], ARGV[2])
+if not payload then
+    return nil
+end
+
+local item = cjson.decode(payload)
+redis.call('HDEL', KEYS[1], ARGV[2])
+redis.call('LREM', KEYS[2], 1, ARGV[2])
+update_meta(KEYS[3], item, -1)
+
+redis.call('PUBLISH', ARGV[1], cjson.encode({
+    event = 'deleted',
+    uri = item['uri'],
+    user = item['user'],
+    uuid = item['uuid']
+}))
+
+return payload
+"""
+
+#: Removes and returns the entry at the head of the queue.
+#:
+#: KEYS: items hash, order list, meta hash
+#: Returns the removed payload or nil if the queue is empty
+POP = PRELUDE + """
+local uuid = redis.call('LPOP', KEYS[2])
+while uuid do
+    local payload = redis.call('HGET', KEYS[1], uuid)
+    if payload then
+        redis.call('HDEL', KEYS[1], uuid)
+        update_meta(KEYS[3], cjson.decode(payload), -1)
+        return payload
+    end
+    uuid = redis.call('LPOP', KEYS[2])
+end
+
+return nil
+"""
+
+#: Moves an entry to a new position in the queue and publishes a moved event.
+#:
+#: KEYS: items hash, order list
+#: ARGV: channel, uuid, zero based position
+#: Returns 1 if the entry was moved or 0 if it is not in the queue
+MOVE = """
+if redis.call('HEXISTS', KEYS[1], ARGV[2]) == 0 then
+    return 0
+end
+
+redis.call('LREM', KEYS[2], 1, ARGV[2])
+
+local position = tonumber(ARGV[3])
+local pivot = redis.call('LINDEX', KEYS[2], position)
+if pivot then
+    redis.call('LINSERT', KEYS[2], 'BEFORE', pivot, ARGV[2])
+else
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+    position = redis.call('LLEN', KEYS[2]) - 1
+end
+
+redis.call('PUBLISH', ARGV[1], cjson.encode({
+    event = 'moved',
+    uuid = ARGV[2],
+    position = position
+}))
+
+return 1
+"""
+
+
+class Script(object):
+    """ A Lua script which is registered with redis the first time it is
+    called in a process and executed with ``EVALSHA`` from then on.
+
+    Example
+    -------
+        >>> from fm.ext import redis
+        >>> from fm.logic import scripts
+        >>> scripts.queue_pop(redis, keys=['items', 'order', 'meta'])
+    """
+
+    def __init__(self, source):
+        """ Constructor.
+
+        Arguments
+        ---------
+        source : str
+            The Lua source of the script
+        """
+
+        self.source = source
+        self.script = None
+
+    def __call__(self, client, keys=[], args=[]):
+        """ Executes the script.
+
+        Arguments
+        ---------
+        client : redis.Redis
+            The redis client to execute the script with
+        keys : list
+            Redis keys the script operates on
+        args : list
+            Script arguments
+        """
+
+        if self.script is None:
+            self.script = client.register_script(self.source)
+
+        return self.script(keys=keys, args=args, client=client)
+
+
+queue_add = Script(ADD)
+queue_delete = Script(DELETE)
+queue_pop = Script(POP)
+queue_move = Script(MOVE)
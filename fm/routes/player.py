@@ -23,6 +23,7 @@ routes = [
     Pluggable('/queue', player.QueueView, 'queue'),
     Pluggable('/queue/<string:uuid>', player.QueueView, 'queue'),
     Pluggable('/queue/meta', player.QueueMetaView, 'queue-meta'),
+    Pluggable('/queue/bulk', player.QueueBulkView, 'queue-bulk'),
     Pluggable('/volume', player.VolumeView, 'volume'),
     Pluggable('/mute', player.MuteView, 'mute'),
     Pluggable('/random', player.RandomView, 'random'),
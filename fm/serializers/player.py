@@ -14,7 +14,7 @@ from kim.fields import Field
 from kim.serializers import Serializer
 
 # First Party Libs
-from fm.serializers.types.spotify import SpotifyURI
+from fm.serializers.types.spotify import SpotifyTrackURIs, SpotifyURI
 
 
 class PlaylistSerializer(Serializer):
@@ -24,6 +24,14 @@ class PlaylistSerializer(Serializer):
     uri = Field(SpotifyURI, required=True)
 
 
+class PlaylistBulkSerializer(Serializer):
+    """ This schema is used for adding several tracks to the player playlist
+    at once.
+    """
+
+    uris = Field(SpotifyTrackURIs, required=True)
+
+
 class VolumeSerializer(Serializer):
     """ Validates altering the player volume.
     """
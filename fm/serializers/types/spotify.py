@@ -100,3 +100,53 @@ class SpotifyURI(t.String):
                 '{0} cannot be played in the GB region'.format(track['name']))
 
         self.track = track
+
+
+class SpotifyTrackURIs(t.TypedType):
+    """ Custom field which validates a list of Spotify track URIs with the
+    spotify API. On marshal the return value will be the decoded JSON data
+    from the Spotify API for each track, in order.
+    """
+
+    type_ = list
+    tracks = None
+
+    def marshal_value(self, value):
+        """ Return track data for each URI.
+
+        Arguments
+        ---------
+        value : list
+            The Spotiy URIs
+
+        Returns
+        -------
+        list
+            Track data from validation
+        """
+
+        return self.tracks
+
+    def validate(self, value):
+        """ Validates each value with Spotify.
+
+        Arguments
+        ---------
+        value : list
+            The Spotiy URIs
+        """
+
+        super(SpotifyTrackURIs, self).validate(value)
+
+        if not value:
+            raise ValidationError('At least one spotify uri is required')
+
+        tracks = []
+        for uri in value:
+            if not uri.startswith('spotify:track:'):
+                raise ValidationError('Not a spotify track uri: {0}'.format(uri))
+            field = SpotifyURI()
+            field.validate(uri)
+            tracks.append(field.track)
+
+        self.tracks = tracks
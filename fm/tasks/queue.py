@@ -12,6 +12,7 @@ Celery Tasks for the Player Queue.
 from fm.ext import celery, db
 from fm.logic.player import Queue
 from fm.models.spotify import Album, Artist, Track
+from fm.models.user import User
 from fm.tasks.artist import update_genres
 from fm.tasks.track import update_analysis
 from fm.thirdparty.spotify import SpotifyApi
@@ -31,23 +32,25 @@ def add_album(uri, user):
         Id of the user whom aded t otrack to the queue
     '''
     spotify_api = SpotifyApi()
-    add_arguments = []
-    for i, track in enumerate(spotify_api.get_album_tracks(uri)):
-        add_arguments.append((track.raw, user, i < 1))
-    add.starmap(add_arguments).apply_async()
+    tracks = [track.raw for track in spotify_api.get_album_tracks(uri)]
+    add_many.delay(tracks, user)
 
 
-@celery.task
-def add(data, user, notification=True):
-    """ Celery task for adding a single track to the queue.
+def store_track(data):
+    """ Creates or updates the album, track and artists of a track from
+    Spotify and schedules the analysis and genre updates.
 
     Arguments
     ---------
     data : dict
         Raw Decoded Spotify API Track JSON data
-    user : str
-        Id of the user whom added the track to the queue
+
+    Returns
+    -------
+    str
+        Id of the stored track
     """
+
     # Create or Update Album
     album = Album.query.filter(Album.spotify_uri == data['album']['uri']).first()
     if album is None:
@@ -74,7 +77,7 @@ def add(data, user, notification=True):
 
     db.session.add(track)
     db.session.commit()
-    Queue.add(track.spotify_uri, user, notification)
+    track_id = track.id  # keep track id outside of session
 
     # Call Sub task for track analysis updating
     update_analysis.s(track.id).delay()
@@ -99,3 +102,59 @@ def add(data, user, notification=True):
 
         # Call Sub task for artist Genre updating
         update_genres.s(artist.id).delay()
+
+    return track_id
+
+
+@celery.task
+def add(data, user, notification=True):
+    """ Celery task for adding a single track to the queue.
+
+    Arguments
+    ---------
+    data : dict
+        Raw Decoded Spotify API Track JSON data
+    user : str
+        Id of the user whom added the track to the queue
+    """
+
+    track_id = store_track(data)
+
+    # Queue the track with a snapshot of the track and user so the queue
+    # can be rendered without going back to the database
+    snapshot = None
+    track = Track.query.get(track_id)
+    queued_by = User.query.get(user)
+    if queued_by is not None:
+        snapshot = Queue.snapshot(track, queued_by)
+
+    Queue.add(track.spotify_uri, user, notification, snapshot=snapshot)
+
+
+@celery.task
+def add_many(tracks, user, notification=True):
+    """ Celery task for adding several tracks to the queue in order with a
+    single queue write.
+
+    Arguments
+    ---------
+    tracks : list
+        Raw Decoded Spotify API Track JSON data for each track
+    user : str
+        Id of the user whom added the tracks to the queue
+    """
+
+    for data in tracks:
+        store_track(data)
+
+    queued_by = User.query.get(user)
+    stored = Queue.load_tracks(data['uri'] for data in tracks)
+
+    entries = []
+    for data in tracks:
+        entry = {'uri': data['uri'], 'user': user}
+        if queued_by is not None:
+            entry['snapshot'] = Queue.snapshot(stored[data['uri']], queued_by)
+        entries.append(entry)
+
+    Queue.add_many(entries, notification)
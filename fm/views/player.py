@@ -11,9 +11,7 @@ Views for handling /player API resource requests.
 from __future__ import division
 
 # Standard Libs
-import itertools
 import json
-from collections import Counter
 from datetime import datetime, timedelta
 
 # Third Party Libs
@@ -33,7 +31,11 @@ from fm.logic import stats
 from fm.logic.player import Queue, Random
 from fm.models.spotify import PlaylistHistory, Track
 from fm.models.user import User
-from fm.serializers.player import PlaylistSerializer, VolumeSerializer
+from fm.serializers.player import (
+    PlaylistBulkSerializer,
+    PlaylistSerializer,
+    VolumeSerializer
+)
 from fm.serializers.spotify import (
     ArtistSerializer,
     HistorySerializer,
@@ -41,7 +43,7 @@ from fm.serializers.spotify import (
 )
 from fm.serializers.user import UserSerializer
 from fm.session import current_user
-from fm.tasks.queue import add, add_album
+from fm.tasks.queue import add, add_album, add_many
 
 
 class PauseView(MethodView):
@@ -360,22 +362,13 @@ class QueueView(MethodView):
         offset = kwargs.pop('offset')
         limit = kwargs.pop('limit')
 
-        queue = redis.lrange(config.PLAYLIST_REDIS_KEY, offset, (offset + limit - 1))
-        total = redis.llen(config.PLAYLIST_REDIS_KEY)
+        queue = Queue.get_queue(offset, limit)
+        total = Queue.length()
 
         response = []
 
         if total > 0:
-            for item in queue:
-                item = json.loads(item)
-                track = Track.query.filter(Track.spotify_uri == item['uri']).first()
-                user = User.query.filter(User.id == item['user']).first()
-                if track is not None and user is not None:
-                    response.append({
-                        'track': TrackSerializer().serialize(track),
-                        'user': UserSerializer().serialize(user),
-                        'uuid': item.get('uuid', None),
-                    })
+            response = Queue.render(queue)
 
         return http.OK(
             response,
@@ -414,23 +407,30 @@ class QueueView(MethodView):
         return http.OK()
 
 
-class QueueMetaView(MethodView):
+class QueueBulkView(MethodView):
+    """ Allows several tracks to be added to the player playlist at once.
+    """
 
-    def get_list_of_genres(self, tracks):
-        artists = [track.album.artists for track in tracks]
-        genres = [artist.genres for artist in itertools.chain(*artists)]
-        return itertools.chain(*genres)
+    @authenticated
+    def post(self):
+        """ Adds a list of tracks to the end of the player playlist in order.
+        """
 
-    def get(self, *args, **kwargs):
-        queue = list(Queue.get_queue())
-        tracks = list(Queue.get_tracks())
+        serializer = PlaylistBulkSerializer()
+        try:
+            obj = serializer.marshal(request.json)
+        except MappingErrors as e:
+            return http.UnprocessableEntity(errors=e.message)
+
+        add_many.delay(obj['uris'], current_user.id)
 
-        return http.OK({
-            'total': Queue.length(),
-            'genres': Counter(g.name for g in self.get_list_of_genres(tracks)),
-            'users': Counter(q['user'] for q in queue),
-            'play_time': sum(track.duration for track in tracks)
-        })
+        return http.Created()
+
+
+class QueueMetaView(MethodView):
+
+    def get(self, *args, **kwargs):
+        return http.OK(Queue.get_meta())
 
 
 class RandomView(MethodView):
@@ -438,11 +438,18 @@ class RandomView(MethodView):
     @authenticated
     def post(self):
         response = []
+        entries = []
         for track in Random.get_tracks(request.json['tracks']):
             response.append({
                 'track': TrackSerializer().serialize(track),
                 'user': UserSerializer().serialize(current_user)
             })
-            Queue.add(track.spotify_uri, current_user.id)
+            entries.append({
+                'uri': track.spotify_uri,
+                'user': current_user.id,
+                'snapshot': Queue.snapshot(track, current_user),
+            })
+
+        Queue.add_many(entries)
 
         return http.Created(response)
@@ -16,6 +16,7 @@ from flask.ext.script import Manager, prompt_bool
 from fm import app
 from fm.events.listener import listener
 from fm.ext import db
+from fm.logic.player import Queue
 
 
 app = app.create()
@@ -35,6 +36,25 @@ def runeventlistener():
         print 'Exited'
 
 
+@manager.command
+def migratequeue():
+    """ Migrate the legacy list based player queue into the uuid indexed
+    queue.
+    """
+
+    total = Queue.migrate()
+    print 'Migrated {0} queue entries'.format(total)
+
+
+@manager.command
+def rebuildqueuemeta():
+    """ Rebuild the player queue meta data from the entries in the queue.
+    """
+
+    meta = Queue.rebuild_meta()
+    print 'Rebuilt meta data for {0} queue entries'.format(meta['total'])
+
+
 @MigrateCommand.command
 def reset():
     """ Reset the current DB
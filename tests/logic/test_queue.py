@@ -1,15 +1,19 @@
 # Standard Libs
+import json
 import unittest
 
 # Third Party Libs
 import mock
+import pytest
 from mockredis import mock_redis_client
 from tests.factories.spotify import TrackFactory
 from tests.factories.user import UserFactory
 
 # First Party Libs
-from fm.ext import db
-from fm.logic.player import Queue
+from fm.ext import config, db
+from fm.logic.player import SNAPSHOT_VERSION, Queue
+from fm.serializers.spotify import TrackSerializer
+from fm.serializers.user import UserSerializer
 
 
 @mock.patch('fm.logic.player.redis', mock_redis_client())
@@ -23,3 +27,207 @@ class TestQueue(unittest.TestCase):
 
         Queue.add(track.spotify_uri, user.id)
         assert Queue.length() == 1
+
+
+class TestQueueIndex(object):
+
+    def setup(self):
+        patch = mock.patch('fm.logic.player.redis', mock_redis_client())
+        self.redis = patch.start()
+        self.redis.publish = mock.MagicMock()
+        self.addPatchCleanup(patch)
+
+    def should_get_entry_by_uuid(self):
+        uuid = Queue.add('spotify:track:foo', 'user')
+
+        assert Queue.exists(uuid)
+        assert Queue.get(uuid) == {
+            'uri': 'spotify:track:foo',
+            'user': 'user',
+            'uuid': uuid,
+            'meta': {'total': 1, 'play_time': 0, 'user:user': 1},
+        }
+
+    def should_return_none_for_unknown_uuid(self):
+        assert not Queue.exists('foo')
+        assert Queue.get('foo') is None
+
+    def should_keep_queue_order(self):
+        uuids = [Queue.add('spotify:track:{0}'.format(i), 'user') for i in range(3)]
+
+        assert [item['uuid'] for item in Queue.get_queue()] == uuids
+        assert Queue.get_item(1)['uuid'] == uuids[1]
+
+    def should_delete_entry_without_scanning_queue(self):
+        uuids = [Queue.add('spotify:track:{0}'.format(i), 'user') for i in range(3)]
+        self.redis.lindex = mock.MagicMock()
+
+        Queue.delete(uuids[1])
+
+        assert not self.redis.lindex.called
+        assert not Queue.exists(uuids[1])
+        assert [item['uuid'] for item in Queue.get_queue()] == [uuids[0], uuids[2]]
+
+    def should_pop_head_of_queue(self):
+        uuids = [Queue.add('spotify:track:{0}'.format(i), 'user') for i in range(2)]
+
+        assert Queue.pop()['uuid'] == uuids[0]
+        assert not Queue.exists(uuids[0])
+        assert Queue.length() == 1
+
+    def should_move_entry(self):
+        uuids = [Queue.add('spotify:track:{0}'.format(i), 'user') for i in range(3)]
+
+        Queue.move(uuids[2], 0)
+        assert [item['uuid'] for item in Queue.get_queue()] == [uuids[2], uuids[0], uuids[1]]
+
+        Queue.move(uuids[2], 10)
+        assert [item['uuid'] for item in Queue.get_queue()] == [uuids[0], uuids[1], uuids[2]]
+
+    def should_not_move_unknown_entry(self):
+        Queue.add('spotify:track:foo', 'user')
+
+        with pytest.raises(ValueError):
+            Queue.move('foo', 0)
+
+    def should_keep_meta_in_step_with_queue(self):
+        uuids = [Queue.add('spotify:track:{0}'.format(i), 'user') for i in range(3)]
+
+        Queue.delete(uuids[1])
+        Queue.pop()
+
+        assert Queue.get_meta()['total'] == 1
+        assert Queue.get_meta()['users'] == {'user': 1}
+
+    def should_add_many_entries_with_one_event(self):
+        uuids = Queue.add_many([
+            {'uri': 'spotify:track:{0}'.format(i), 'user': 'user'}
+            for i in range(3)])
+
+        assert [item['uuid'] for item in Queue.get_queue()] == uuids
+        assert Queue.get_meta()['total'] == 3
+        assert self.redis.publish.call_count == 1
+
+        channel, message = self.redis.publish.call_args[0]
+        assert channel == config.PLAYER_CHANNEL
+        assert json.loads(message) == {
+            'event': 'add',
+            'uri': 'spotify:track:0',
+            'user': 'user',
+            'tracks': [
+                {'uri': 'spotify:track:{0}'.format(i), 'user': 'user', 'uuid': uuid}
+                for i, uuid in enumerate(uuids)],
+        }
+
+    def should_not_write_empty_batch(self):
+        assert Queue.add_many([]) == []
+        assert not self.redis.publish.called
+
+    def should_migrate_legacy_queue(self):
+        self.redis.rpush(config.PLAYLIST_REDIS_KEY, json.dumps({
+            'uri': 'spotify:track:foo',
+            'user': 'user',
+            'uuid': '16fd2706-8baf-433b-82eb-8c7fada847da',
+        }))
+        self.redis.rpush(config.PLAYLIST_REDIS_KEY, json.dumps({
+            'uri': 'spotify:track:bar',
+            'user': 'user',
+        }))
+
+        assert Queue.migrate() == 2
+
+        queue = list(Queue.get_queue())
+        assert [item['uri'] for item in queue] == ['spotify:track:foo', 'spotify:track:bar']
+        assert queue[0]['uuid'] == '16fd2706-8baf-433b-82eb-8c7fada847da'
+        assert Queue.exists(queue[1]['uuid'])
+        assert not self.redis.exists(config.PLAYLIST_REDIS_KEY)
+
+
+class TestQueueHydrate(object):
+
+    def setup(self):
+        patch = mock.patch('fm.logic.player.redis', mock_redis_client())
+        self.redis = patch.start()
+        self.redis.publish = mock.MagicMock()
+        self.addPatchCleanup(patch)
+
+    def should_keep_queue_order(self):
+        tracks = TrackFactory.create_batch(3)
+        users = UserFactory.create_batch(2)
+        db.session.add_all(tracks + users)
+        db.session.commit()
+
+        entries = [
+            (tracks[2], users[0]),
+            (tracks[0], users[1]),
+            (tracks[2], users[1]),
+            (tracks[1], users[0]),
+        ]
+        for track, user in entries:
+            Queue.add(track.spotify_uri, user.id)
+
+        hydrated = Queue.hydrate(Queue.get_queue())
+
+        assert [(track, user) for _, track, user in hydrated] == entries
+        assert list(Queue.get_tracks()) == [track for track, _ in entries]
+
+    def should_return_none_for_missing_track(self):
+        user = UserFactory()
+        db.session.add(user)
+        db.session.commit()
+
+        Queue.add('spotify:track:foo', user.id)
+
+        [(item, track, user)] = Queue.hydrate(Queue.get_queue())
+
+        assert item['uri'] == 'spotify:track:foo'
+        assert track is None
+        assert user is not None
+
+
+class TestQueueSnapshot(object):
+
+    def setup(self):
+        patch = mock.patch('fm.logic.player.redis', mock_redis_client())
+        self.redis = patch.start()
+        self.redis.publish = mock.MagicMock()
+        self.addPatchCleanup(patch)
+
+        self.track = TrackFactory()
+        self.user = UserFactory()
+        db.session.add_all([self.track, self.user])
+        db.session.commit()
+
+    def should_render_entry_from_snapshot(self):
+        snapshot = Queue.snapshot(self.track, self.user)
+        uuid = Queue.add(self.track.spotify_uri, self.user.id, snapshot=snapshot)
+
+        with mock.patch('fm.logic.player.Queue.load_tracks') as load_tracks:
+            load_tracks.return_value = {}
+            response = Queue.render(Queue.get_queue())
+
+        load_tracks.assert_called_once_with(mock.ANY)
+        assert list(load_tracks.call_args[0][0]) == []
+        assert response == [{
+            'track': TrackSerializer().serialize(self.track),
+            'user': UserSerializer().serialize(self.user),
+            'uuid': uuid,
+        }]
+
+    def should_hydrate_entry_with_old_snapshot_version(self):
+        snapshot = Queue.snapshot(self.track, self.user)
+        snapshot['version'] = SNAPSHOT_VERSION - 1
+        snapshot['track']['name'] = 'Stale'
+        Queue.add(self.track.spotify_uri, self.user.id, snapshot=snapshot)
+
+        response = Queue.render(Queue.get_queue())
+
+        assert response[0]['track'] == TrackSerializer().serialize(self.track)
+
+    def should_hydrate_entry_without_snapshot(self):
+        Queue.add(self.track.spotify_uri, self.user.id)
+
+        response = Queue.render(Queue.get_queue())
+
+        assert response[0]['track'] == TrackSerializer().serialize(self.track)
+        assert response[0]['user'] == UserSerializer().serialize(self.user)
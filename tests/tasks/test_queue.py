@@ -9,6 +9,7 @@ Unit Tests for Celery Queue Tasks
 """
 
 # Standard Libs
+import copy
 import json
 
 # Third Party Libs
@@ -19,10 +20,12 @@ from tests.factories.spotify import AlbumFactory, ArtistFactory, TrackFactory
 from tests.factories.user import UserFactory
 
 # First Party Libs
-from fm.ext import config, db
+from fm.ext import db
+from fm.logic.player import Queue
 from fm.models.spotify import Album, Artist, Track
 from fm.models.user import User
-from fm.tasks.queue import add
+from fm.serializers.spotify import TrackSerializer
+from fm.tasks.queue import add, add_album, add_many
 
 
 class TestAdd(object):
@@ -144,14 +147,75 @@ class TestAdd(object):
     def should_add_track_to_playlist_and_publish_event(self):
         add.delay(TRACK_DATA, self.user.id)
 
-        queue = self.redis.get(config.PLAYLIST_REDIS_KEY)
+        queue = list(Queue.get_queue())
         user = User.query.one()
 
         assert len(queue) == 1
-        assert json.loads(queue[0])['user'] == user.id
-        assert json.loads(queue[0])['uri'] == TRACK_DATA['uri']
+        assert queue[0]['user'] == user.id
+        assert queue[0]['uri'] == TRACK_DATA['uri']
         assert self.redis.publish.caled_once_with(json.dumps({
             'event': 'add',
             'uri': TRACK_DATA['uri'],
             'user': user.id
         }))
+
+    def should_embed_track_and_user_snapshot_in_queue_entry(self):
+        add.delay(TRACK_DATA, self.user.id)
+
+        [item] = Queue.get_queue()
+        snapshot = Queue.get_snapshot(item)
+        track = Track.query.one()
+        user = User.query.one()
+
+        assert snapshot is not None
+        assert snapshot['track'] == TrackSerializer().serialize(track)
+        assert snapshot['user']['id'] == user.id
+        assert snapshot['genres'] == []
+
+
+class TestAddMany(object):
+
+    def setup(self):
+        user = UserFactory()
+
+        db.session.add(user)
+        db.session.commit()
+
+        self.user = User.query.one()
+
+        patch = mock.patch('fm.logic.player.redis', mock_redis_client())
+        self.redis = patch.start()
+        self.redis.publish = mock.MagicMock()
+        self.addPatchCleanup(patch)
+
+        patch = mock.patch('fm.tasks.queue.update_genres')
+        patch.start()
+        self.addPatchCleanup(patch)
+
+        self.tracks = []
+        for i in range(3):
+            track = copy.deepcopy(TRACK_DATA)
+            track['uri'] = 'spotify:track:{0}'.format(i)
+            self.tracks.append(track)
+
+    def should_add_tracks_in_order_and_publish_one_event(self):
+        add_many.delay(self.tracks, self.user.id)
+
+        queue = list(Queue.get_queue())
+
+        assert Track.query.count() == 3
+        assert [item['uri'] for item in queue] == [t['uri'] for t in self.tracks]
+        assert all(Queue.get_snapshot(item) is not None for item in queue)
+        assert self.redis.publish.call_count == 1
+
+    def should_add_album_tracks_in_one_task(self):
+        with mock.patch('fm.tasks.queue.SpotifyApi') as api:
+            api.return_value.get_album_tracks.return_value = [
+                mock.MagicMock(raw=track) for track in self.tracks]
+
+            add_album.delay('spotify:album:foo', self.user.id)
+
+        queue = list(Queue.get_queue())
+
+        assert [item['uri'] for item in queue] == [t['uri'] for t in self.tracks]
+        assert self.redis.publish.call_count == 1
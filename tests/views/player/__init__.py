@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""
+tests.views.player
+==================
+
+Helpers shared by the player view tests.
+"""
+
+# Standard Libs
+import json
+import uuid
+
+# First Party Libs
+from fm.ext import config
+
+
+def push_to_queue(redis, item):
+    """ Pushes a raw entry onto the end of the player queue, bypassing
+    ``fm.logic.player.Queue`` so tests can control the stored data.
+
+    Arguments
+    ---------
+    redis : mockredis.MockRedis
+        The redis client to push the entry into
+    item : dict
+        The queue entry, a uuid will be generated if one is not present
+    """
+
+    item.setdefault('uuid', str(uuid.uuid4()))
+
+    redis.hset(config.PLAYLIST_ITEMS_REDIS_KEY, item['uuid'], json.dumps(item))
+    redis.rpush(config.PLAYLIST_ORDER_REDIS_KEY, item['uuid'])
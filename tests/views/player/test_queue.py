@@ -21,9 +21,11 @@ from mockredis import mock_redis_client
 from tests import TRACK_DATA
 from tests.factories.spotify import TrackFactory
 from tests.factories.user import UserFactory
+from tests.views.player import push_to_queue
 
 # First Party Libs
 from fm.ext import config, db
+from fm.logic.player import Queue
 from fm.models.spotify import Artist
 from fm.models.user import User
 from fm.serializers.spotify import TrackSerializer
@@ -64,13 +66,10 @@ class TestGetQueue(QueueTest):
 
         # Add the track 3 times to the queue - we should get it 3 times
         for i in range(3):
-            self.redis.rpush(
-                config.PLAYLIST_REDIS_KEY,
-                json.dumps({
-                    'uri': track.spotify_uri,
-                    'user': user.id
-                })
-            )
+            push_to_queue(self.redis, {
+                'uri': track.spotify_uri,
+                'user': user.id
+            })
 
         url = url_for('player.queue')
         response = self.client.get(url)
@@ -94,18 +93,16 @@ class TestGetQueue(QueueTest):
 
         expected = []
         for i, track in enumerate(tracks):
-            self.redis.rpush(
-                config.PLAYLIST_REDIS_KEY,
-                json.dumps({
-                    'uri': track.spotify_uri,
-                    'user': users[i].id,
-                    'uuid': '16fd2706-8baf-433b-82eb-8c7fada847da',
-                })
-            )
+            track_uuid = str(uuid.uuid4())
+            push_to_queue(self.redis, {
+                'uri': track.spotify_uri,
+                'user': users[i].id,
+                'uuid': track_uuid,
+            })
             expected.append({
                 'track': TrackSerializer().serialize(track),
                 'user': UserSerializer().serialize(users[i]),
-                'uuid': '16fd2706-8baf-433b-82eb-8c7fada847da',
+                'uuid': track_uuid,
             })
 
         url = url_for('player.queue')
@@ -170,13 +167,13 @@ class TestQueuePost(QueueTest):
             'uri': 'spotify:track:foo'
         }))
 
-        queue = self.redis.get(config.PLAYLIST_REDIS_KEY)
+        queue = list(Queue.get_queue())
         user = User.query.one()
 
         assert response.status_code == httplib.CREATED, response.data
         assert len(queue) == 1
-        assert json.loads(queue[0])['user'] == user.id
-        assert json.loads(queue[0])['uri'] == TRACK_DATA['uri']
+        assert queue[0]['user'] == user.id
+        assert queue[0]['uri'] == TRACK_DATA['uri']
         assert self.redis.publish.caled_once_with(json.dumps({
             'event': 'add',
             'uri': TRACK_DATA['uri'],
@@ -215,7 +212,7 @@ class TestQueuePost(QueueTest):
     #         'uri': 'spotify:album:6akEvsycLGftJxYudPjmqK'
     #     }))
 
-    #     queue = self.redis.get(config.PLAYLIST_REDIS_KEY)
+    #     queue = list(Queue.get_queue())
     #     assert response.status_code == httplib.CREATED
     #     assert len(queue) == 2
     #     assert self.redis.publish.call_count == 1
@@ -241,19 +238,16 @@ class TestQueueDelete(QueueTest):
 
         for i, track in enumerate(tracks):
             track_uuid = str(uuid.uuid4())
-            self.redis.rpush(
-                config.PLAYLIST_REDIS_KEY,
-                json.dumps({
-                    'uri': track.spotify_uri,
-                    'user': current_user.id,
-                    'uuid': track_uuid,
-                })
-            )
+            push_to_queue(self.redis, {
+                'uri': track.spotify_uri,
+                'user': current_user.id,
+                'uuid': track_uuid,
+            })
 
         url = url_for('player.queue', uuid=track_uuid)
         response = self.client.delete(url)
         assert response.status_code == httplib.OK
-        assert self.redis.llen(config.PLAYLIST_REDIS_KEY) == 2
+        assert self.redis.llen(config.PLAYLIST_ORDER_REDIS_KEY) == 2
 
     def should_return_no_content_for_non_existing_key(self):
         TrackFactory.create()
@@ -269,26 +263,23 @@ class TestQueueDelete(QueueTest):
         db.session.add(track)
         db.session.commit()
 
-        self.redis.rpush(
-            config.PLAYLIST_REDIS_KEY,
-            json.dumps({
-                'uri': track.spotify_uri,
-                'user': current_user.id,
-                'uuid': '16fd2706-8baf-433b-82eb-8c7fada847da',
-            })
-        )
+        push_to_queue(self.redis, {
+            'uri': track.spotify_uri,
+            'user': current_user.id,
+            'uuid': '16fd2706-8baf-433b-82eb-8c7fada847da',
+        })
 
         url = url_for('player.queue')
         url = url_for('player.queue', uuid='16fd2706-8baf-433b-82eb-8c7fada847da')
         response = self.client.delete(url)
 
         assert response.status_code == httplib.OK
-        self.redis.publish.assert_called_once_with(
-            config.PLAYER_CHANNEL,
-            json.dumps({
-                'event': 'deleted',
-                'uri': track.spotify_uri,
-                'user': current_user.id,
-                'uuid': '16fd2706-8baf-433b-82eb-8c7fada847da'
-            })
-        )
+        channel, message = self.redis.publish.call_args[0]
+        assert self.redis.publish.call_count == 1
+        assert channel == config.PLAYER_CHANNEL
+        assert json.loads(message) == {
+            'event': 'deleted',
+            'uri': track.spotify_uri,
+            'user': current_user.id,
+            'uuid': '16fd2706-8baf-433b-82eb-8c7fada847da'
+        }
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""
+tests.views.player.test_queue_bulk
+==================================
+
+Unit tests for the ``fm.views.player.QueueBulkView`` class.
+"""
+
+# Standard Libs
+import copy
+import httplib
+import json
+
+# Third Party Libs
+import mock
+import pytest
+from flask import url_for
+from mockredis import mock_redis_client
+from tests import TRACK_DATA
+
+# First Party Libs
+from fm.logic.player import Queue
+from fm.models.user import User
+
+
+@pytest.mark.usefixtures("authenticated")
+class TestQueueBulkPost(object):
+
+    def setup(self):
+        self.redis = mock_redis_client()
+        self.redis.publish = mock.MagicMock()
+
+        patch = mock.patch(
+            'fm.logic.player.redis',
+            new_callable=mock.PropertyMock(return_value=self.redis))
+        patch.start()
+        self.addPatchCleanup(patch)
+
+        patch = mock.patch('fm.tasks.queue.update_genres')
+        patch.start()
+        self.addPatchCleanup(patch)
+
+        patch = mock.patch('fm.tasks.queue.update_analysis')
+        patch.start()
+        self.addPatchCleanup(patch)
+
+        patch = mock.patch('requests.get')
+        self.requests_mock = patch.start()
+        self.addPatchCleanup(patch)
+
+    @pytest.mark.usefixtures("unauthenticated")
+    def must_be_authenticated(self):
+        url = url_for('player.queue-bulk')
+        response = self.client.post(url, data=json.dumps({
+            'uris': ['spotify:track:foo']
+        }))
+
+        assert response.status_code == httplib.UNAUTHORIZED
+
+    def must_only_accept_track_uris(self):
+        url = url_for('player.queue-bulk')
+        response = self.client.post(url, data=json.dumps({
+            'uris': ['spotify:album:foo']
+        }))
+
+        assert response.status_code == httplib.UNPROCESSABLE_ENTITY
+        assert response.json['errors']['uris'][0] \
+            == 'Not a spotify track uri: spotify:album:foo'
+
+    def must_catch_validation_errors_for_non_existing_spotify_item(self):
+        self.requests_mock.return_value = mock.MagicMock(
+            status_code=httplib.NOT_FOUND
+        )
+
+        url = url_for('player.queue-bulk')
+        response = self.client.post(url, data=json.dumps({
+            'uris': ['spotify:track:foo']
+        }))
+
+        assert response.status_code == httplib.UNPROCESSABLE_ENTITY
+        assert response.json['errors']['uris'][0] \
+            == 'Track not found on Spotify: spotify:track:foo'
+
+    def should_add_tracks_to_queue_in_order_with_one_event(self):
+        tracks = []
+        for i in range(3):
+            track = copy.deepcopy(TRACK_DATA)
+            track['uri'] = 'spotify:track:{0}'.format(i)
+            tracks.append(track)
+
+        self.requests_mock.side_effect = [
+            mock.MagicMock(
+                status_code=httplib.OK,
+                json=mock.MagicMock(return_value=data))
+            for data in tracks]
+
+        url = url_for('player.queue-bulk')
+        response = self.client.post(url, data=json.dumps({
+            'uris': [data['uri'] for data in tracks]
+        }))
+
+        queue = list(Queue.get_queue())
+        user = User.query.one()
+
+        assert response.status_code == httplib.CREATED, response.data
+        assert [item['uri'] for item in queue] == [data['uri'] for data in tracks]
+        assert all(item['user'] == user.id for item in queue)
+        assert all(Queue.get_snapshot(item) is not None for item in queue)
+        assert self.redis.publish.call_count == 1
+
+        event = json.loads(self.redis.publish.call_args[0][1])
+        assert event['event'] == 'add'
+        assert [data['uuid'] for data in event['tracks']] \
+            == [item['uuid'] for item in queue]
@@ -8,9 +8,6 @@ tests.views.player.test_queue_meta
 Unit tests for the ``fm.views.player.QueueMetaView`` class.
 """
 
-# Standard Libs
-import json
-
 # Third Party Libs
 import mock
 from flask import url_for
@@ -25,6 +22,7 @@ from tests.factories.spotify import (
 
 # First Party Libs
 from fm.ext import config, db
+from fm.logic.player import Queue
 
 
 class TestQueueMeta(object):
@@ -61,13 +59,7 @@ class TestQueueMeta(object):
         db.session.commit()
 
         for track in tracks:
-            self.redis.rpush(
-                config.PLAYLIST_REDIS_KEY,
-                json.dumps({
-                    'uri': track.spotify_uri,
-                    'user': 'user'
-                })
-            )
+            Queue.add(track.spotify_uri, 'user')
         url = url_for('player.queue-meta')
         response = self.client.get(url)
         assert response.json['total']
@@ -81,13 +73,7 @@ class TestQueueMeta(object):
         db.session.commit()
 
         for track in tracks:
-            self.redis.rpush(
-                config.PLAYLIST_REDIS_KEY,
-                json.dumps({
-                    'uri': track.spotify_uri,
-                    'user': 'user'
-                })
-            )
+            Queue.add(track.spotify_uri, 'user')
 
         url = url_for('player.queue-meta')
         response = self.client.get(url)
@@ -101,13 +87,7 @@ class TestQueueMeta(object):
         db.session.commit()
 
         for track in tracks:
-            self.redis.rpush(
-                config.PLAYLIST_REDIS_KEY,
-                json.dumps({
-                    'uri': track.spotify_uri,
-                    'user': 'user'
-                })
-            )
+            Queue.add(track.spotify_uri, 'user')
 
         url = url_for('player.queue-meta')
         response = self.client.get(url)
@@ -123,13 +103,7 @@ class TestQueueMeta(object):
 
         users_in_queue = [users[0], users[0], users[1]]
         for track in tracks:
-            self.redis.rpush(
-                config.PLAYLIST_REDIS_KEY,
-                json.dumps({
-                    'uri': track.spotify_uri,
-                    'user': users_in_queue.pop().id
-                })
-            )
+            Queue.add(track.spotify_uri, users_in_queue.pop().id)
 
         url = url_for('player.queue-meta')
         response = self.client.get(url)
@@ -158,16 +132,85 @@ class TestQueueMeta(object):
         db.session.commit()
 
         for track in tracks:
-            self.redis.rpush(
-                config.PLAYLIST_REDIS_KEY,
-                json.dumps({
-                    'uri': track.spotify_uri,
-                    'user': 'user'
-                })
-            )
+            Queue.add(track.spotify_uri, 'user')
 
         url = url_for('player.queue-meta')
         response = self.client.get(url)
 
         assert response.status_code == 200
         assert response.json['genres'] == {genres[0].name: 2, genres[1].name: 1}
+
+    def should_count_genres_and_play_time_from_snapshots(self):
+        genre = GenreFactory()
+        track = TrackFactory(
+            album=AlbumWithArtist(
+                artists=[ArtistFactory(genres=[genre])]
+            )
+        )
+        user = UserFactory()
+        db.session.add_all([track, user])
+        db.session.commit()
+
+        with mock.patch('fm.logic.player.Queue.load_tracks') as load_tracks:
+            load_tracks.return_value = {}
+            Queue.add(track.spotify_uri, user.id, snapshot=Queue.snapshot(track, user))
+
+        assert list(load_tracks.call_args[0][0]) == []
+
+        url = url_for('player.queue-meta')
+        response = self.client.get(url)
+
+        assert response.status_code == 200
+        assert response.json['genres'] == {genre.name: 1}
+        assert response.json['play_time'] == track.duration
+
+    def should_not_load_queue_on_read(self):
+        url = url_for('player.queue-meta')
+        with mock.patch('fm.logic.player.Queue.get_queue') as get_queue:
+            response = self.client.get(url)
+
+        assert response.status_code == 200
+        assert not get_queue.called
+        assert response.json == {
+            'total': 0,
+            'genres': {},
+            'users': {},
+            'play_time': 0,
+        }
+
+    def should_remove_deleted_and_popped_tracks(self):
+        tracks = TrackFactory.create_batch(3)
+        users = UserFactory.create_batch(3)
+        db.session.add_all(tracks + users)
+        db.session.commit()
+
+        uuids = [
+            Queue.add(track.spotify_uri, user.id)
+            for track, user in zip(tracks, users)
+        ]
+        Queue.delete(uuids[1])
+        Queue.pop()
+
+        url = url_for('player.queue-meta')
+        response = self.client.get(url)
+
+        assert response.json['total'] == 1
+        assert response.json['users'] == {users[2].id: 1}
+        assert response.json['play_time'] == tracks[2].duration
+        assert response.json['genres'] == dict(
+            (name, 1) for name in Queue.get_genres(tracks[2]))
+
+    def should_rebuild_drifted_meta(self):
+        track = TrackFactory()
+        db.session.add(track)
+        db.session.commit()
+
+        Queue.add(track.spotify_uri, 'user')
+        self.redis.hincrby(config.PLAYLIST_META_REDIS_KEY, 'total', 5)
+        self.redis.hincrby(config.PLAYLIST_META_REDIS_KEY, 'user:ghost', 2)
+
+        meta = Queue.rebuild_meta()
+
+        assert meta['total'] == 1
+        assert meta['users'] == {'user': 1}
+        assert meta['play_time'] == track.duration